@@ -1,7 +1,7 @@
 import sys, subprocess
 print("Python:", sys.executable)
 print("Version:", sys.version)
-for m in ["duckdb","pandas","pyarrow","openpyxl","matplotlib","yaml"]:
+for m in ["duckdb","pandas","pyarrow","openpyxl","python_calamine","matplotlib","yaml"]:
     try:
         __import__(m)
         print(f"OK: {m}")
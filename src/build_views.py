@@ -1,7 +1,11 @@
-import duckdb, pathlib as p
+import pathlib as p
+from db import get_conn
 
 ROOT = p.Path(__file__).resolve().parents[1]
-db = duckdb.connect(str(ROOT / "warehouse" / "condor.duckdb"))
+db = get_conn()
+
+# One transaction for all DDL: catalog changes are committed (and fsynced) once
+db.execute("BEGIN;")
 
 db.execute("CREATE SCHEMA IF NOT EXISTS config;")
 db.execute("CREATE OR REPLACE TABLE config.params AS SELECT 25.0 AS variable_cost_per_seat_leg, 0.15 AS connection_value_pct;")
@@ -19,5 +23,11 @@ for f in [
     db.execute(sql_path.read_text())
     print(f"Executed: {f}")
 
-db.close()
+# Materialize the stable KPI views so exports read a table instead of re-running the view DAG
+KPI_TABLES = ["fwlf_overall", "fwlf_by_segment", "pacs_leg", "yalf_overall", "aras_overall"]
+for v in KPI_TABLES:
+    db.execute(f"CREATE OR REPLACE TABLE kpi_mat.{v} AS SELECT * FROM kpi.{v};")
+print("Materialized:", ", ".join(f"kpi_mat.{v}" for v in KPI_TABLES))
+
+db.execute("COMMIT;")
 print("All views/checks created.")
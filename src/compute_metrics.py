@@ -1,8 +1,9 @@
-import duckdb, yaml, pathlib as p, pandas as pd
+import yaml, pathlib as p
+from db import get_conn
 
 ROOT = p.Path(__file__).resolve().parents[1]
 cfg = yaml.safe_load((ROOT / "config" / "metrics.yaml").read_text())
-db = duckdb.connect(str(ROOT / "warehouse" / "condor.duckdb"))
+db = get_conn()
 
 # Re-define macros dynamically using config values
 vcpsl = float(cfg['costs']['variable_cost_per_seat_leg'])
@@ -11,19 +12,18 @@ db.execute(f"CREATE OR REPLACE MACRO variable_cost_per_seat_leg() AS {vcpsl};")
 db.execute(f"CREATE OR REPLACE MACRO connection_value_pct()        AS {cvpct};")
 
 queries = {
-    "fwlf_overall": "SELECT * FROM kpi.fwlf_overall;",
-    "fwlf_by_segment": "SELECT * FROM kpi.fwlf_by_segment;",
-    "pacs_leg": "SELECT * FROM kpi.pacs_leg;",
-    "yalf_overall": "SELECT * FROM kpi.yalf_overall;",
-    "aras_overall": "SELECT * FROM kpi.aras_overall;",
+    "fwlf_overall": "SELECT * FROM kpi_mat.fwlf_overall;",
+    "fwlf_by_segment": "SELECT * FROM kpi_mat.fwlf_by_segment;",
+    "pacs_leg": "SELECT * FROM kpi_mat.pacs_leg;",
+    "yalf_overall": "SELECT * FROM kpi_mat.yalf_overall;",
+    "aras_overall": "SELECT * FROM kpi_mat.aras_overall;",
     "leg_detail": "SELECT * FROM mart.leg_with_yield_index;"
 }
 
 outdir = ROOT / "data_derived"
 outdir.mkdir(exist_ok=True, parents=True)
 for name, q in queries.items():
-    df = db.execute(q).df()
-    df.to_csv(outdir / f"{name}.csv", index=False)
+    # DuckDB's CSV writer streams the result straight to disk (no pandas round-trip)
+    path = str(outdir / f"{name}.csv").replace("'", "''")  # SQL string literal: double any quote in the checkout path
+    db.execute(f"COPY ({q.rstrip(';')}) TO '{path}' (HEADER, FORMAT CSV);")
     print("Exported:", name)
-
-db.close()
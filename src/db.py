@@ -0,0 +1,13 @@
+import atexit, duckdb, functools, os, pathlib as p
+
+ROOT = p.Path(__file__).resolve().parents[1]
+DB_PATH = ROOT / "warehouse" / "condor.duckdb"
+
+# One warehouse connection per process: pipeline steps imported together reuse the
+# same buffer manager / catalog instead of re-opening the file. Closed at exit.
+@functools.lru_cache(maxsize=1)
+def get_conn() -> duckdb.DuckDBPyConnection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = duckdb.connect(str(DB_PATH), config={"threads": str(os.cpu_count())})
+    atexit.register(conn.close)
+    return conn
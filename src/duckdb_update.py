@@ -1,8 +1,18 @@
-import duckdb
+import yaml, pathlib as p
+from db import get_conn
 
-conn = duckdb.connect('warehouse/condor.duckdb')
-with open('sql/05_params.sql', 'r') as file:
-    sql_commands = file.read()
+ROOT = p.Path(__file__).resolve().parents[1]
+cfg = yaml.safe_load((ROOT / "config" / "metrics.yaml").read_text())
+conn = get_conn()
 
-# Execute the SQL commands
-conn.execute(sql_commands)
+# KPI params come from config/metrics.yaml (single source of truth, same as compute_metrics.py)
+vcpsl = float(cfg['costs']['variable_cost_per_seat_leg'])
+cvpct = float(cfg['uplifts']['connection_value_pct_of_ticket_rev'])
+conn.execute(f"CREATE OR REPLACE MACRO variable_cost_per_seat_leg() AS {vcpsl};")
+conn.execute(f"CREATE OR REPLACE MACRO connection_value_pct()        AS {cvpct};")
+
+# Keep cfg.params (read by run_queries.py / test_query.sql) in sync with the YAML
+conn.execute("CREATE SCHEMA IF NOT EXISTS cfg;")
+conn.execute(f"""CREATE OR REPLACE TABLE cfg.params AS
+SELECT {vcpsl} AS variable_cost_per_seat_leg,
+       {cvpct} AS connection_value_pct_of_ticket_rev;""")
@@ -1,15 +1,19 @@
 
+import duckdb
 import pandas as pd
-import numpy as np
-import re
+import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from workbook import cached_frames, normalize_booking_ids, write_csv
 
 REV_COLS = [
     'revenue_per_booking_(ticket)',
     'revenue_per_booking_(ancilliary_pre_check_in)',
     'revenue_per_booking_(ancilliary_at_check_in)'
 ]
+# Workbook dates are ISO strings (YYYY-MM-DD); an explicit format skips dateutil inference
+DATE_FORMAT = 'ISO8601'
 
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -19,38 +23,28 @@ def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
                   .str.lower())
     return df
 
-def normalize_booking_id(x):
-    if pd.isna(x):
-        return np.nan
-    s = str(x).strip()
-    s_num = re.sub(r'\D+', '', s)  # keep digits only
-    return s_num if s_num != '' else np.nan
+SHEETS = ["Booking", "Passenger", "Flight"]
 
 def load_excel(path: Path):
-    xl = pd.ExcelFile(path)
-    booking = pd.read_excel(xl, "Booking")
-    passenger = pd.read_excel(xl, "Passenger")
-    flight = pd.read_excel(xl, "Flight")
-    booking = clean_cols(booking)
-    passenger = clean_cols(passenger)
-    flight = clean_cols(flight)
-    return booking, passenger, flight
+    # one read_excel call so the workbook is opened and parsed once; Parquet copy under <xlsx>.parquet/dq/
+    def read():
+        sheets = pd.read_excel(path, sheet_name=SHEETS, engine="openpyxl")
+        return [clean_cols(sheets[name]) for name in SHEETS]
+    return cached_frames(path, "dq", SHEETS, read, __file__)
 
 def add_derived(booking: pd.DataFrame, passenger: pd.DataFrame, flight: pd.DataFrame):
-    booking = booking.copy()
-    passenger = passenger.copy()
-    flight = flight.copy()
+    # Mutates the frames in place: they come straight from load_excel and are not shared
 
     # IDs
-    booking['bookingid_norm'] = booking['bookingid_(pnr)'].apply(normalize_booking_id)
-    passenger['bookingid_norm'] = passenger['bookingid'].apply(normalize_booking_id)
+    booking['bookingid_norm'] = normalize_booking_ids(booking['bookingid_(pnr)'])
+    passenger['bookingid_norm'] = normalize_booking_ids(passenger['bookingid'])
 
     # Dates
     for c in ['reservation_date','cancellation_date','flight_date']:
         if c in booking.columns:
-            booking[c] = pd.to_datetime(booking[c], errors='coerce')
+            booking[c] = pd.to_datetime(booking[c], format=DATE_FORMAT, errors='coerce', cache=True)
     if 'flightdate' in flight.columns:
-        flight['flightdate'] = pd.to_datetime(flight['flightdate'], errors='coerce')
+        flight['flightdate'] = pd.to_datetime(flight['flightdate'], format=DATE_FORMAT, errors='coerce', cache=True)
 
     # Numeric
     for c in REV_COLS:
@@ -65,80 +59,143 @@ def add_derived(booking: pd.DataFrame, passenger: pd.DataFrame, flight: pd.DataF
         + '-' + booking['destination'].astype(str).str.upper().str.strip()
     )
 
+    # Low-cardinality text columns as category (registered in DuckDB as ENUMs)
+    for df in (booking, passenger):
+        for c in ['origin','destination','booking_channel','device_used']:
+            if c in df.columns:
+                df[c] = df[c].astype('category')
+
+    # flightnumber shares one category dictionary across booking/flight so the capacity join matches codes
+    if 'flightnumber' in booking.columns and 'flightnumber' in flight.columns:
+        fn_dtype = pd.CategoricalDtype(pd.Index(booking['flightnumber'].dropna().unique())
+                                         .union(flight['flightnumber'].dropna().unique()))
+        booking['flightnumber'] = booking['flightnumber'].astype(fn_dtype)
+        flight['flightnumber'] = flight['flightnumber'].astype(fn_dtype)
+
     return booking, passenger, flight
 
+def multi_vals_sql(table: str, key: str, col: str) -> str:
+    # Rows whose key maps to more than one distinct col value (NULL counts as a value).
+    # DISTINCT pairs + a plain count is one hash pass, cheaper than COUNT(DISTINCT) per group.
+    return f"""
+        SELECT * FROM {table}
+        WHERE {key} IN (
+            SELECT {key} FROM (SELECT DISTINCT {key}, {col} FROM {table})
+            WHERE {key} IS NOT NULL
+            GROUP BY {key}
+            HAVING COUNT(*) > 1)"""
+
 def dq_checks(booking: pd.DataFrame, passenger: pd.DataFrame, flight: pd.DataFrame):
     out = {}
 
+    # Checks run as SQL over the registered frames; only the result sets come back to pandas
+    con = duckdb.connect()
+    con.register('booking', booking)
+    con.register('passenger', passenger)
+    con.register('flight', flight)
+
+    def q(sql: str) -> pd.DataFrame:
+        return con.execute(sql).fetch_df()
+
     # 1) Canceled with ancillary at check-in
     if {'cancellation_date','revenue_per_booking_(ancilliary_at_check_in)'}.issubset(booking.columns):
-        mask = booking['cancellation_date'].notna() & (booking['revenue_per_booking_(ancilliary_at_check_in)'] > 0)
-        out['canceled_with_checkin_ancillary'] = booking.loc[mask].copy()
+        out['canceled_with_checkin_ancillary'] = q("""
+            SELECT * FROM booking
+            WHERE cancellation_date IS NOT NULL
+              AND "revenue_per_booking_(ancilliary_at_check_in)" > 0""")
 
     # 2) Cancellation before reservation
     if {'cancellation_date','reservation_date'}.issubset(booking.columns):
-        mask = booking['cancellation_date'].notna() & booking['reservation_date'].notna() & (booking['cancellation_date'] < booking['reservation_date'])
-        out['cancellation_before_reservation'] = booking.loc[mask].copy()
+        out['cancellation_before_reservation'] = q("""
+            SELECT * FROM booking
+            WHERE cancellation_date < reservation_date""")
 
     # 2b) Reservation after flight date
     if {'reservation_date','flight_date'}.issubset(booking.columns):
-        mask = booking['reservation_date'].notna() & booking['flight_date'].notna() & (booking['reservation_date'] > booking['flight_date'])
-        out['reservation_after_flight'] = booking.loc[mask].copy()
+        out['reservation_after_flight'] = q("""
+            SELECT * FROM booking
+            WHERE reservation_date > flight_date""")
 
     # 3) Same booking multiple channels/devices
     if 'bookingid_norm' in passenger.columns and 'booking_channel' in passenger.columns:
-        multi_channel = passenger.groupby('bookingid_norm')['booking_channel'].nunique(dropna=False)
-        ids = multi_channel[(multi_channel.index.notna()) & (multi_channel > 1)].index
-        out['same_booking_multiple_channels'] = passenger[passenger['bookingid_norm'].isin(ids)].copy()
+        out['same_booking_multiple_channels'] = q(multi_vals_sql('passenger', 'bookingid_norm', 'booking_channel'))
 
     if 'bookingid_norm' in passenger.columns and 'device_used' in passenger.columns:
-        multi_device = passenger.groupby('bookingid_norm')['device_used'].nunique(dropna=False)
-        ids = multi_device[(multi_device.index.notna()) & (multi_device > 1)].index
-        out['same_booking_multiple_devices'] = passenger[passenger['bookingid_norm'].isin(ids)].copy()
+        out['same_booking_multiple_devices'] = q(multi_vals_sql('passenger', 'bookingid_norm', 'device_used'))
 
     # 4) Revenue but zero passengers
-    booking['total_revenue'] = booking[REV_COLS].sum(axis=1, skipna=True)
-    mask = (booking['passengercount'] == 0) & (booking['total_revenue'] > 0)
-    out['revenue_with_zero_passengers'] = booking.loc[mask].copy()
+    # total_revenue is materialized once and reused by every check below
+    con.execute("""
+        CREATE TEMP TABLE booking_rev AS
+        SELECT *,
+               COALESCE("revenue_per_booking_(ticket)", 0)
+             + COALESCE("revenue_per_booking_(ancilliary_pre_check_in)", 0)
+             + COALESCE("revenue_per_booking_(ancilliary_at_check_in)", 0) AS total_revenue
+        FROM booking""")
+    out['revenue_with_zero_passengers'] = q("""
+        SELECT * FROM booking_rev
+        WHERE passengercount = 0 AND total_revenue > 0""")
 
     # 5) Negative revenue or passengers
-    neg_rev = (booking[REV_COLS] < 0).any(axis=1)
-    out['negative_revenue_fields'] = booking.loc[neg_rev].copy()
-    neg_pax = booking['passengercount'] < 0
-    out['negative_passengers'] = booking.loc[neg_pax].copy()
+    out['negative_revenue_fields'] = q("""
+        SELECT * FROM booking_rev
+        WHERE least("revenue_per_booking_(ticket)",
+                    "revenue_per_booking_(ancilliary_pre_check_in)",
+                    "revenue_per_booking_(ancilliary_at_check_in)") < 0""")
+    out['negative_passengers'] = q("SELECT * FROM booking_rev WHERE passengercount < 0")
 
     # 6) Capacity joins
-    leg = (booking.groupby(['flightnumber','flight_date','origin','destination'], dropna=False)
-           .agg(pax=('passengercount','sum'))
-           .reset_index())
-    leg = leg.merge(flight[['flightnumber','flightdate','availablecapacity']],
-                    left_on=['flightnumber','flight_date'],
-                    right_on=['flightnumber','flightdate'],
-                    how='left')
-    leg['capacity_anomaly'] = (leg['pax'] > leg['availablecapacity']) & leg['availablecapacity'].notna()
-    out['pax_exceeds_capacity'] = leg.loc[leg['capacity_anomaly']].copy()
-    out['missing_capacity_for_leg'] = leg.loc[leg['availablecapacity'].isna()].copy()
-    out['capacity_out_of_range'] = leg.loc[leg['availablecapacity'].notna() & ((leg['availablecapacity'] < 160) | (leg['availablecapacity'] > 200))].copy()
+    con.execute("""
+        CREATE TEMP TABLE leg AS
+        WITH agg AS (
+            SELECT flightnumber, flight_date, origin, destination,
+                   COALESCE(SUM(passengercount), 0)::BIGINT AS pax
+            FROM booking_rev
+            GROUP BY 1,2,3,4
+        )
+        SELECT a.*, f.flightdate, f.availablecapacity,
+               COALESCE(a.pax > f.availablecapacity, FALSE) AS capacity_anomaly
+        FROM agg a
+        LEFT JOIN flight f
+          ON a.flightnumber = f.flightnumber
+         AND a.flight_date  = f.flightdate
+        ORDER BY a.flightnumber, a.flight_date, a.origin, a.destination""")
+    out['pax_exceeds_capacity'] = q("SELECT * FROM leg WHERE capacity_anomaly")
+    out['missing_capacity_for_leg'] = q("SELECT * FROM leg WHERE availablecapacity IS NULL")
+    out['capacity_out_of_range'] = q("""
+        SELECT * FROM leg
+        WHERE availablecapacity < 160 OR availablecapacity > 200""")
 
     # 7) Routing inconsistent with OD
-    routing_upper = booking['routing'].astype(str).str.upper().str.replace(' ', '')
-    od1 = booking['origin'].astype(str).str.upper().str.replace(' ', '') + '-' + booking['destination'].astype(str).str.upper().str.replace(' ', '')
-    od2 = booking['origin'].astype(str).str.upper().str.replace(' ', '') + '→' + booking['destination'].astype(str).str.upper().str.replace(' ', '')
-    inconsistent = ~(routing_upper.eq(od1) | routing_upper.eq(od2))
-    out['routing_inconsistent_with_od'] = booking.loc[inconsistent].copy()
-
-    # 8) Duplicate legs within PNR
-    dup_cols = ['bookingid_norm','flightnumber','flight_date','origin','destination']
-    dup_mask = booking.duplicated(subset=dup_cols, keep=False)
-    out['duplicate_legs_within_pnr'] = booking.loc[dup_mask].copy()
+    # normalize each column once, then test all accepted separators against it
+    out['routing_inconsistent_with_od'] = q("""
+        WITH od AS (
+            SELECT *,
+                   upper(replace(routing, ' ', ''))     AS routing_upper,
+                   upper(replace(origin, ' ', ''))      AS o,
+                   upper(replace(destination, ' ', '')) AS d
+            FROM booking_rev
+        )
+        SELECT * EXCLUDE (routing_upper, o, d) FROM od
+        WHERE COALESCE(routing_upper NOT IN (o || '-' || d, o || '→' || d, o || '->' || d), TRUE)""")
+
+    # 8) Duplicate legs within PNR (partitioned on the real key columns, so hash collisions can't pair distinct legs)
+    out['duplicate_legs_within_pnr'] = q("""
+        SELECT * EXCLUDE (n_legs) FROM (
+            SELECT *, COUNT(*) OVER (PARTITION BY bookingid_norm, flightnumber, flight_date, origin, destination) AS n_legs
+            FROM booking_rev)
+        WHERE n_legs > 1
+        ORDER BY bookingid_norm, flightnumber, flight_date""")
 
     # 9) Cancellation with positive pax
-    mask = booking['cancellation_date'].notna() & (booking['passengercount'] > 0)
-    out['cancellation_with_positive_pax'] = booking.loc[mask].copy()
+    out['cancellation_with_positive_pax'] = q("""
+        SELECT * FROM booking_rev
+        WHERE cancellation_date IS NOT NULL AND passengercount > 0""")
 
     # 10) Missing flight date
-    out['missing_flight_date'] = booking.loc[booking['flight_date'].isna()].copy()
+    out['missing_flight_date'] = q("SELECT * FROM booking_rev WHERE flight_date IS NULL")
 
+    con.close()
     return out
 
 def main():
@@ -155,11 +212,11 @@ def main():
 
     # Summary
     summary = {k: len(v) for k,v in anomalies.items()}
-    pd.DataFrame(list(summary.items()), columns=["check","count"]).sort_values(by="count", ascending=False).to_csv(args.out/"dq_summary.csv", index=False)
+    write_csv(pd.DataFrame(list(summary.items()), columns=["check","count"]).sort_values(by="count", ascending=False), args.out/"dq_summary.csv")
 
-    # Save each anomaly CSV
-    for k, df in anomalies.items():
-        df.to_csv(args.out/f"{k}.csv", index=False)
+    # Save each anomaly CSV; pyarrow's C++ writer releases the GIL, so the files are written in parallel
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        list(ex.map(lambda kv: write_csv(kv[1], args.out/f"{kv[0]}.csv"), anomalies.items()))
 
     print("Wrote DQ outputs to:", args.out.resolve())
 
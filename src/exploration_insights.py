@@ -1,37 +1,56 @@
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import re
+import duckdb
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # PNG output only; no GUI backend in the render workers
 import matplotlib.pyplot as plt
+from workbook import EXCEL_ENGINE, cached_frames, normalize_booking_ids, write_csv
 
 # ---------- Helpers
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out.columns = out.columns.str.strip().str.replace(r"\s+", "_", regex=True).str.lower()
+    # renames in place; only the column Index is rebuilt, the data is not copied
+    df.columns = df.columns.str.strip().str.replace(r"\s+", "_", regex=True).str.lower()
+    return df
+
+CHANNEL_MAP = {
+    "condor app": "condor app",
+    "condor-app": "condor app",
+    "app": "condor app",
+    "website": "website",
+    "web": "website",
+    "call center": "call center",
+    "travel agency": "travel agency",
+    "ota": "ota",
+    "online travel agency": "ota",
+}
+
+DOW_DTYPE = pd.CategoricalDtype(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], ordered=True)
+
+def norm_text_channel(s: pd.Series) -> pd.Series:
+    return s.astype("string[pyarrow]").str.strip().str.lower().replace(CHANNEL_MAP)
+
+def _safe_div(num: pd.Series, den: pd.Series) -> np.ndarray:
+    # num/den only where den > 0, NaN elsewhere; masked lanes are never divided
+    n = num.to_numpy(dtype=np.float64, na_value=np.nan)
+    d = den.to_numpy(dtype=np.float64, na_value=np.nan)
+    out = np.full(n.shape, np.nan)
+    np.divide(n, d, out=out, where=d > 0)
     return out
 
-def normalize_booking_id(x):
-    if pd.isna(x): return np.nan
-    s = str(x).strip()
-    s_num = re.sub(r"\D+", "", s)             # keep digits only
-    return s_num if s_num else np.nan
-
-def norm_text_channel(s):
-    if pd.isna(s): return s
-    s2 = str(s).strip().lower()
-    mapping = {
-        "condor app": "condor app",
-        "condor-app": "condor app",
-        "app": "condor app",
-        "website": "website",
-        "web": "website",
-        "call center": "call center",
-        "travel agency": "travel agency",
-        "ota": "ota",
-        "online travel agency": "ota",
-    }
-    return mapping.get(s2, s2)
+NS_PER_DAY = np.int64(86_400_000_000_000)
+NAT_I8 = np.iinfo(np.int64).min
+
+def days_between(end: pd.Series, start: pd.Series) -> pd.Series:
+    # whole days on the raw int64 nanoseconds (no timedelta/.dt.days temporaries); NaT → <NA>
+    e = end.to_numpy("datetime64[ns]").view("i8")
+    s = start.to_numpy("datetime64[ns]").view("i8")
+    days = (e - s) // NS_PER_DAY
+    return pd.Series(pd.arrays.IntegerArray(days, (e == NAT_I8) | (s == NAT_I8)), index=end.index)
 
 def ensure_dirs(base: Path):
     (base / "tables").mkdir(parents=True, exist_ok=True)
@@ -42,119 +61,183 @@ def save_chart(figpath: Path):
     plt.savefig(figpath)
     plt.close()
 
-# ---------- Analysis & KPIs
-def run_analysis(xlsx_path: Path, out_dir: Path):
-    ensure_dirs(out_dir)
-
-    tables_dir = out_dir / "tables"
-    charts_dir = out_dir / "charts"
-
-
-    # Load sheets
-    xl = pd.ExcelFile(xlsx_path)
-    booking = clean_cols(pd.read_excel(xl, "Booking"))
-    passenger = clean_cols(pd.read_excel(xl, "Passenger"))
-    flight = clean_cols(pd.read_excel(xl, "Flight"))
+def render_chart(spec: dict):
+    # one chart per call; runs in a worker process, so spec holds only plain data
+    plt.figure(figsize=spec.get("figsize", (7,4)))
+    kind = spec["kind"]
+    if kind == "bar":
+        plt.bar(spec["x"], spec["y"])
+    elif kind == "barh":
+        plt.barh(spec["x"], spec["y"])
+        plt.gca().invert_yaxis()
+    elif kind == "line":
+        plt.plot(spec["x"], spec["y"])
+    elif kind == "lines":
+        for y in spec["ys"]:
+            plt.plot(spec["x"], y)
+    elif kind == "scatter":
+        plt.scatter(spec["x"], spec["y"])
+    plt.title(spec["title"])
+    if "rotation" in spec:
+        plt.xticks(rotation=spec["rotation"])
+    if "xlabel" in spec:
+        plt.xlabel(spec["xlabel"])
+    if "ylabel" in spec:
+        plt.ylabel(spec["ylabel"])
+    if "legend_title" in spec:
+        plt.legend(title=spec["legend_title"], bbox_to_anchor=(1.02, 1), loc="upper left", borderaxespad=0.)
+    save_chart(spec["path"])
+
+# ---------- Load & normalize
+def load_and_normalize(xlsx_path: Path):
+    # Load sheets (calamine when installed, else openpyxl; workbook opened once for all three sheets).
+    # Only the columns the analysis touches; dates parsed and numerics typed at read time.
+    # Booking keeps every column because booking_clean exports the full sheet.
+    rev_cols_raw = [
+        "Revenue per Booking (Ticket)",
+        "Revenue per Booking (Ancilliary pre check in)",
+        "Revenue per Booking (Ancilliary AT check in)",
+    ]
+    with pd.ExcelFile(xlsx_path, engine=EXCEL_ENGINE) as xl:
+        booking = xl.parse("Booking",
+                           dtype={"Origin": "string", "Destination": "string",
+                                  **{c: "float64" for c in rev_cols_raw}},
+                           parse_dates=["Reservation Date", "Cancellation Date", "Flight Date"])
+        passenger = xl.parse("Passenger", usecols=["BookingID", "Booking Channel"])
+        flight = xl.parse("Flight",
+                          usecols=["FlightNumber", "FlightDate", "AvailableCapacity", "TimeOfDay", "RouteType"],
+                          parse_dates=["FlightDate"])
+    booking = clean_cols(booking)
+    passenger = clean_cols(passenger)
+    flight = clean_cols(flight)
 
     # Normalize keys & fields
-    booking["bookingid_norm"] = booking["bookingid_(pnr)"].apply(normalize_booking_id)
-    passenger["bookingid_norm"] = passenger["bookingid"].apply(normalize_booking_id)
-
-    # Dates / numerics
-    for c in ["reservation_date", "cancellation_date", "flight_date"]:
-        booking[c] = pd.to_datetime(booking[c], errors="coerce")
-    flight["flightdate"] = pd.to_datetime(flight["flightdate"], errors="coerce")
+    booking["bookingid_norm"] = normalize_booking_ids(booking["bookingid_(pnr)"])
+    passenger["bookingid_norm"] = normalize_booking_ids(passenger["bookingid"])
 
     rev_cols = [
         "revenue_per_booking_(ticket)",
         "revenue_per_booking_(ancilliary_pre_check_in)",
         "revenue_per_booking_(ancilliary_at_check_in)",
     ]
-    for c in rev_cols:
-        booking[c] = pd.to_numeric(booking[c], errors="coerce")
     booking["total_revenue"] = booking[rev_cols].sum(axis=1, skipna=True)
-    booking["passengercount"] = pd.to_numeric(booking["passengercount"], errors="coerce")
 
-    # Canonical routing & channel/device normalization
-    booking["origin"] = booking["origin"].astype(str).str.upper().str.strip()
-    booking["destination"] = booking["destination"].astype(str).str.upper().str.strip()
-    booking["routing_canonical"] = booking["origin"] + "-" + booking["destination"]
+    # Canonical routing & channel normalization
+    # Arrow-backed strings: strip/upper run natively over the UTF-8 buffer
+    for c in ["origin", "destination"]:
+        booking[c] = booking[c].astype("string[pyarrow]").str.strip().str.upper()
+    booking["routing_canonical"] = booking["origin"].str.cat(booking["destination"], sep="-")
+    # low-cardinality group keys as category: groupbys hash int codes instead of strings
+    for c in ["origin", "destination"]:
+        booking[c] = booking[c].astype("category")
 
-    passenger["booking_channel_norm"] = passenger["booking_channel"].apply(norm_text_channel)
-    passenger["device_used_norm"] = passenger["device_used"].astype(str).str.strip().str.lower()
+    passenger["booking_channel_norm"] = norm_text_channel(passenger["booking_channel"]).astype("category")
 
     # Flags & derived
-    booking["is_cancelled"] = booking["cancellation_date"].notna()
-    booking["flight_dow"] = booking["flight_date"].dt.day_name()
-    booking["days_after_booking_to_cancel"] = (booking["cancellation_date"] - booking["reservation_date"]).dt.days
-    booking["days_before_flight_to_cancel"] = (booking["flight_date"] - booking["cancellation_date"]).dt.days
-    booking["lead_time_days"] = (booking["flight_date"] - booking["reservation_date"]).dt.days
+    # 0/1 uint8 flag: integer groupby sums, 1 byte per row in the exports
+    booking["is_cancelled"] = booking["cancellation_date"].notna().to_numpy(np.uint8)
+    # weekday codes straight into the ordered DOW categorical (0=Monday; NaT → -1 → NaN), no day_name() strings
+    booking["flight_dow"] = pd.Categorical.from_codes(
+        booking["flight_date"].dt.weekday.fillna(-1).astype("int8"), dtype=DOW_DTYPE)
+    booking["days_after_booking_to_cancel"] = days_between(booking["cancellation_date"], booking["reservation_date"])
+    booking["days_before_flight_to_cancel"] = days_between(booking["flight_date"], booking["cancellation_date"])
+    booking["lead_time_days"] = days_between(booking["flight_date"], booking["reservation_date"])
     booking["ancillary_total"] = booking["revenue_per_booking_(ancilliary_pre_check_in)"].fillna(0) + \
                                  booking["revenue_per_booking_(ancilliary_at_check_in)"].fillna(0)
 
+    return booking, passenger, flight
+
+def load_tables(xlsx_path: Path):
+    # normalized tables cached under <xlsx>.parquet/insights/; re-runs skip Excel entirely, and an
+    # edit to this script (normalization, CHANNEL_MAP, derived columns) invalidates the copy
+    return cached_frames(xlsx_path, "insights", ["booking", "passenger", "flight"],
+                         lambda: load_and_normalize(xlsx_path), __file__)
+
+# ---------- Analysis & KPIs
+def run_analysis(xlsx_path: Path, out_dir: Path, csv_dumps: bool = False):
+    ensure_dirs(out_dir)
+
+    tables_dir = out_dir / "tables"
+    charts_dir = out_dir / "charts"
+
+    booking, passenger, flight = load_tables(xlsx_path)
+
+    # cancelled subset, filtered once and reused by every cancellation table/insight below
+    canc = booking.loc[booking["is_cancelled"].astype(bool)]
+
     # ---- Join Passenger → Booking (primary channel by PNR)
+    # first non-null channel per PNR (built-in "first" skips NA; PNRs with no channel fall out of the left merge as NaN)
     pnr_channel = (passenger
-                   .groupby("bookingid_norm")
-                   .agg(primary_channel=("booking_channel_norm", lambda s: next((v for v in s if pd.notna(v)), np.nan)),
-                        devices=("device_used_norm", lambda s: pd.Series([v for v in s if pd.notna(v)]).unique().tolist()))
+                   .dropna(subset=["booking_channel_norm"])
+                   .groupby("bookingid_norm", sort=False)
+                   .agg(primary_channel=("booking_channel_norm", "first"))
                    .reset_index())
-    booking_enriched = booking.merge(pnr_channel[["bookingid_norm", "primary_channel"]], on="bookingid_norm", how="left")
+    booking_enriched = booking.merge(pnr_channel, on="bookingid_norm", how="left")
 
     # ---- Leg table: Booking × Flight
-    leg = (booking.groupby(["flightnumber", "flight_date", "origin", "destination"], dropna=False)
-           .agg(pax=("passengercount", "sum"),
-                revenue=("total_revenue", "sum"),
-                cancels=("is_cancelled", "sum"))
-           .reset_index())
-    leg = leg.merge(flight[["flightnumber", "flightdate", "availablecapacity", "timeofday", "routetype"]],
-                    left_on=["flightnumber", "flight_date"],
-                    right_on=["flightnumber", "flightdate"],
-                    how="left").drop(columns=["flightdate"])
-    leg["load_factor"] = np.where(leg["availablecapacity"] > 0, leg["pax"] / leg["availablecapacity"], np.nan)
-    leg["rev_per_pax"] = np.where(leg["pax"] > 0, leg["revenue"] / leg["pax"], np.nan)
+    # aggregation + capacity join run in DuckDB (vectorized, parallel); only the leg-grain result comes back
+    con = duckdb.connect()
+    con.register("booking", booking)
+    con.register("flight", flight)
+    leg = con.execute("""
+        WITH agg AS (
+            SELECT flightnumber, flight_date, origin, destination, flight_dow AS dow,
+                   COALESCE(SUM(passengercount), 0)::BIGINT AS pax,  -- all-null group → 0, as pandas sum gave
+                   SUM(total_revenue)          AS revenue,
+                   SUM(is_cancelled)::BIGINT AS cancels
+            FROM booking
+            GROUP BY 1,2,3,4,5
+        )
+        SELECT a.*, f.availablecapacity, f.timeofday, f.routetype
+        FROM agg a
+        LEFT JOIN flight f
+          ON a.flightnumber = f.flightnumber
+         AND a.flight_date  = f.flightdate
+        ORDER BY 1,2,3,4
+    """).fetch_df()
+    con.close()
+    for c in ["timeofday", "routetype"]:
+        leg[c] = leg[c].astype("category")
+    leg["dow"] = leg["dow"].astype(DOW_DTYPE)  # DuckDB hands the ENUM back unordered
+    leg["load_factor"] = _safe_div(leg["pax"], leg["availablecapacity"])
+    leg["rev_per_pax"] = _safe_div(leg["revenue"], leg["pax"])
 
     # ---- Core tables
     # A) Cancellations by DOW (count and rate)
-    dow_order = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    cxl_by_dow = (booking[booking["is_cancelled"]]
-                  .groupby("flight_dow").size()
-                  .reindex(dow_order).fillna(0).astype(int).reset_index(name="cancel_count"))
-    bookings_by_dow = (booking.groupby("flight_dow").size()
-                       .reindex(dow_order).fillna(0).astype(int).reset_index(name="bookings"))
-    cxl_rate_by_dow = bookings_by_dow.merge(cxl_by_dow, on="flight_dow", how="left")
-    cxl_rate_by_dow["cancel_rate"] = np.where(cxl_rate_by_dow["bookings"]>0,
-                                              cxl_rate_by_dow["cancel_count"]/cxl_rate_by_dow["bookings"], np.nan)
+    # one pass over booking for both counts (no filtered copy, no merge);
+    # observed=False keeps all seven weekdays in calendar order, zero-filled
+    cxl_rate_by_dow = (booking.groupby("flight_dow", observed=False)
+                       .agg(bookings=("is_cancelled", "size"), cancel_count=("is_cancelled", "sum"))
+                       .astype(int).reset_index())
+    cxl_rate_by_dow["cancel_rate"] = _safe_div(cxl_rate_by_dow["cancel_count"], cxl_rate_by_dow["bookings"])
 
     # B) Cxl distributions (after booking / before flight)
-    cxl_after_booking_dist = (booking[booking["is_cancelled"]]
+    cxl_after_booking_dist = (canc
                               .groupby("days_after_booking_to_cancel").size()
                               .reset_index(name="count").sort_values("days_after_booking_to_cancel"))
-    cxl_before_flight_dist = (booking[booking["is_cancelled"]]
+    cxl_before_flight_dist = (canc
                               .groupby("days_before_flight_to_cancel").size()
                               .reset_index(name="count").sort_values("days_before_flight_to_cancel"))
 
     # C) Channel cancellation rate
-    cxl_by_channel = (booking_enriched.groupby("primary_channel")
+    cxl_by_channel = (booking_enriched.groupby("primary_channel", observed=True)
                       .agg(bookings=("bookingid_norm","count"),
                            cancels=("is_cancelled","sum")).reset_index())
-    cxl_by_channel["cancel_rate"] = np.where(cxl_by_channel["bookings"]>0,
-                                             cxl_by_channel["cancels"]/cxl_by_channel["bookings"], np.nan)
+    cxl_by_channel["cancel_rate"] = _safe_div(cxl_by_channel["cancels"], cxl_by_channel["bookings"])
 
     # D) LF by DOW & time of day
-    lf_by_date = (leg.groupby("flight_date").agg(load=("load_factor","mean")).reset_index())
-    lf_by_date["dow"] = lf_by_date["flight_date"].dt.day_name()
-    lf_by_dow = (lf_by_date.groupby("dow")["load"].mean()
-                 .reindex(dow_order).reset_index().rename(columns={"load":"avg_load_factor"}))
-    lf_by_tod = leg.groupby("timeofday")["load_factor"].mean().reset_index().rename(columns={"load_factor":"avg_load_factor"})
+    lf_by_date = (leg.groupby(["flight_date", "dow"], observed=True).agg(load=("load_factor","mean")).reset_index())
+    # observed=False: all seven weekdays in calendar order (NaN where no flights)
+    lf_by_dow = (lf_by_date.groupby("dow", observed=False)["load"].mean()
+                 .reset_index().rename(columns={"load":"avg_load_factor"}))
+    lf_by_tod = leg.groupby("timeofday", observed=True)["load_factor"].mean().reset_index().rename(columns={"load_factor":"avg_load_factor"})
 
     # D1) --- LF by Segment & Day of Week (long + wide tables)
-    # Build DOW on leg grain first (use same dow_order defined above)
-    leg['dow'] = leg['flight_date'].dt.day_name()
-    lf_seg_dow = (leg.groupby(['origin', 'destination', 'dow'])['load_factor']
+    # DOW is carried on the leg grain from booking.flight_dow (aggregation key)
+    lf_seg_dow = (leg.groupby(['origin', 'destination', 'dow'], observed=True)['load_factor']
                      .mean()
                      .reset_index())
-    lf_seg_dow['segment'] = lf_seg_dow['origin'] + '→' + lf_seg_dow['destination']
-    lf_seg_dow['dow'] = pd.Categorical(lf_seg_dow['dow'], categories=dow_order, ordered=True)
+    lf_seg_dow['segment'] = lf_seg_dow['origin'].astype(str) + '→' + lf_seg_dow['destination'].astype(str)
 
     # Pivot to wide for charting: rows = DOW, columns = segment
     lf_seg_dow_wide = (lf_seg_dow.pivot_table(index='dow',
@@ -164,24 +247,23 @@ def run_analysis(xlsx_path: Path, out_dir: Path):
                                   .sort_index())
 
     # Save both long and wide tables
-    lf_seg_dow.to_csv(tables_dir / "lf_by_segment_by_dow_long.csv", index=False)
-    lf_seg_dow_wide.to_csv(tables_dir / "lf_by_segment_by_dow_wide.csv", index=True)
+    write_csv(lf_seg_dow, tables_dir / "lf_by_segment_by_dow_long.csv")
+    write_csv(lf_seg_dow_wide.reset_index(), tables_dir / "lf_by_segment_by_dow_wide.csv")
 
     # E) Segment KPIs (OD level)
-    seg = (booking.groupby(["origin","destination"])
+    # one pass over booking; the ancillary-share denominator is just revenue
+    seg = (booking.groupby(["origin","destination"], sort=False, observed=True)
            .agg(bookings=("bookingid_norm","count"),
                 cancels=("is_cancelled","sum"),
                 pax=("passengercount","sum"),
-                revenue=("total_revenue","sum")).reset_index())
-    seg["cancel_rate"] = np.where(seg["bookings"]>0, seg["cancels"]/seg["bookings"], np.nan)
-    seg["rev_per_pax"] = np.where(seg["pax"]>0, seg["revenue"]/seg["pax"], np.nan)
-    anc_denom = booking.groupby(["origin","destination"])["total_revenue"].sum().reset_index(name="denom")
-    anc_num = booking.groupby(["origin","destination"])["ancillary_total"].sum().reset_index(name="num")
-    seg = seg.merge(anc_denom, on=["origin","destination"]).merge(anc_num, on=["origin","destination"])
-    seg["anc_share"] = np.where(seg["denom"]>0, seg["num"]/seg["denom"], np.nan)
+                revenue=("total_revenue","sum"),
+                num=("ancillary_total","sum")).reset_index())
+    seg["cancel_rate"] = _safe_div(seg["cancels"], seg["bookings"])
+    seg["rev_per_pax"] = _safe_div(seg["revenue"], seg["pax"])
+    seg["anc_share"] = _safe_div(seg["num"], seg["revenue"])
 
     # F) Directional imbalance (LF OD vs reverse OD)
-    lf_seg = leg.groupby(["origin","destination"])["load_factor"].mean().reset_index()
+    lf_seg = leg.groupby(["origin","destination"], observed=True)["load_factor"].mean().reset_index()
     lf_seg_rev = lf_seg.rename(columns={"origin":"destination", "destination":"origin", "load_factor":"load_factor_rev"})
     imb = lf_seg.merge(lf_seg_rev, on=["origin","destination"], how="left")
     imb["lf_diff_vs_reverse"] = imb["load_factor"] - imb["load_factor_rev"]
@@ -194,86 +276,72 @@ def run_analysis(xlsx_path: Path, out_dir: Path):
 
     # ------------ Save tables
     tables_dir = out_dir / "tables"
-    cxl_rate_by_dow.to_csv(tables_dir / "cancellation_by_dow.csv", index=False)
-    cxl_after_booking_dist.to_csv(tables_dir / "cancellation_days_after_booking.csv", index=False)
-    cxl_before_flight_dist.to_csv(tables_dir / "cancellation_days_before_flight.csv", index=False)
-    cxl_by_channel.sort_values("bookings", ascending=False).to_csv(tables_dir / "cancellation_by_channel.csv", index=False)
-    lf_by_dow.to_csv(tables_dir / "lf_by_dow.csv", index=False)
-    lf_by_tod.to_csv(tables_dir / "lf_by_time_of_day.csv", index=False)
-    seg.sort_values("revenue", ascending=False).to_csv(tables_dir / "segment_kpis.csv", index=False)
-    imb.sort_values("lf_diff_vs_reverse", ascending=False).to_csv(tables_dir / "directional_imbalance.csv", index=False)
-    pd.DataFrame({"rev_lf_corr":[rev_lf_corr]}).to_csv(tables_dir / "rev_lf_correlation.csv", index=False)
-    booking.to_csv(tables_dir / "booking_clean.csv", index=False)
-    leg.to_csv(tables_dir / "leg_table.csv", index=False)
+    write_csv(cxl_rate_by_dow, tables_dir / "cancellation_by_dow.csv")
+    write_csv(cxl_after_booking_dist, tables_dir / "cancellation_days_after_booking.csv")
+    write_csv(cxl_before_flight_dist, tables_dir / "cancellation_days_before_flight.csv")
+    write_csv(cxl_by_channel.sort_values("bookings", ascending=False), tables_dir / "cancellation_by_channel.csv")
+    write_csv(lf_by_dow, tables_dir / "lf_by_dow.csv")
+    write_csv(lf_by_tod, tables_dir / "lf_by_time_of_day.csv")
+    write_csv(seg.sort_values("revenue", ascending=False), tables_dir / "segment_kpis.csv")
+    write_csv(imb.sort_values("lf_diff_vs_reverse", ascending=False), tables_dir / "directional_imbalance.csv")
+    write_csv(pd.DataFrame({"rev_lf_corr":[rev_lf_corr]}), tables_dir / "rev_lf_correlation.csv")
+    # row-level dumps: Parquet (snappy) by default, CSV copies only on request
+    booking.to_parquet(tables_dir / "booking_clean.parquet", compression="snappy", index=False)
+    leg.to_parquet(tables_dir / "leg_table.parquet", compression="snappy", index=False)
+    if csv_dumps:
+        write_csv(booking, tables_dir / "booking_clean.csv")
+        write_csv(leg, tables_dir / "leg_table.csv")
 
     # ------------ Charts (matplotlib; one chart per figure, default style/colors)
     charts_dir = out_dir / "charts"
 
-    # 1) Cancellations by DOW (bars)
-    plt.figure(figsize=(7,4))
-    plt.bar(cxl_rate_by_dow["flight_dow"], cxl_rate_by_dow["cancel_count"])
-    plt.title("Cancellations by Flight Day of Week (count)")
-    plt.xticks(rotation=30)
-    save_chart(charts_dir / "cxl_by_dow_count.png")
-
-    plt.figure(figsize=(7,4))
-    plt.bar(cxl_rate_by_dow["flight_dow"], cxl_rate_by_dow["cancel_rate"])
-    plt.title("Cancellation Rate by Flight Day of Week")
-    plt.xticks(rotation=30)
-    save_chart(charts_dir / "cxl_by_dow_rate.png")
-
-    # 2) Cancellation distributions (lines)
-    plt.figure(figsize=(7,4))
-    plt.plot(cxl_after_booking_dist["days_after_booking_to_cancel"], cxl_after_booking_dist["count"])
-    plt.title("Cancellations — Days After Booking")
-    plt.xlabel("Days after booking"); plt.ylabel("Count")
-    save_chart(charts_dir / "cxl_days_after_booking.png")
-
-    plt.figure(figsize=(7,4))
-    plt.plot(cxl_before_flight_dist["days_before_flight_to_cancel"], cxl_before_flight_dist["count"])
-    plt.title("Cancellations — Days Before Flight")
-    plt.xlabel("Days before flight"); plt.ylabel("Count")
-    save_chart(charts_dir / "cxl_days_before_flight.png")
-
-    # 3) LF by DOW and Time of Day
-    plt.figure(figsize=(7,4))
-    plt.bar(lf_by_dow["dow"], lf_by_dow["avg_load_factor"])
-    plt.title("Average Load Factor by Day of Week")
-    plt.xticks(rotation=30)
-    save_chart(charts_dir / "lf_by_dow.png")
-
-    plt.figure(figsize=(6,4))
-    plt.bar(lf_by_tod["timeofday"], lf_by_tod["avg_load_factor"])
-    plt.title("Average Load Factor by Time of Day")
-    save_chart(charts_dir / "lf_by_time_of_day.png")
-
-    # Chart: Load Factor by Segment and Day of Week (multi-line)
-    plt.figure(figsize=(9,5))
-    for segment_label in lf_seg_dow_wide.columns:
-        plt.plot(lf_seg_dow_wide.index.astype(str), lf_seg_dow_wide[segment_label])
-
-    plt.title("Load Factor by Segment and Day of Week")
-    plt.xlabel("Day of Week")
-    plt.ylabel("Average Load Factor")
-    plt.legend(title="Segment", bbox_to_anchor=(1.02, 1), loc="upper left", borderaxespad=0.)
-    save_chart(charts_dir / "lf_by_segment_by_dow.png")
-
-
-    # 4) Revenue per pax vs LF (scatter)
-    plt.figure(figsize=(6,4))
-    plt.scatter(leg["load_factor"], leg["rev_per_pax"])
-    plt.title("Revenue per Passenger vs Load Factor (Leg Level)")
-    plt.xlabel("Load Factor"); plt.ylabel("Revenue per Passenger (€)")
-    save_chart(charts_dir / "rev_per_pax_vs_lf.png")
-
-    # 5) Ancillary share by top segments (barh)
     seg_top = seg.sort_values("revenue", ascending=False).head(8).copy()
-    seg_top["od"] = seg_top["origin"] + "→" + seg_top["destination"]
-    plt.figure(figsize=(7,4))
-    plt.barh(seg_top["od"], seg_top["anc_share"])
-    plt.title("Ancillary Share — Top Segments by Revenue")
-    plt.gca().invert_yaxis()
-    save_chart(charts_dir / "anc_share_top_segments.png")
+    seg_top["od"] = seg_top["origin"].astype(str) + "→" + seg_top["destination"].astype(str)
+    dow_labels = cxl_rate_by_dow["flight_dow"].astype(str).tolist()
+
+    charts = [
+        # 1) Cancellations by DOW (bars)
+        dict(kind="bar", path=charts_dir / "cxl_by_dow_count.png",
+             x=dow_labels, y=cxl_rate_by_dow["cancel_count"].to_numpy(),
+             title="Cancellations by Flight Day of Week (count)", rotation=30),
+        dict(kind="bar", path=charts_dir / "cxl_by_dow_rate.png",
+             x=dow_labels, y=cxl_rate_by_dow["cancel_rate"].to_numpy(),
+             title="Cancellation Rate by Flight Day of Week", rotation=30),
+        # 2) Cancellation distributions (lines)
+        dict(kind="line", path=charts_dir / "cxl_days_after_booking.png",
+             x=cxl_after_booking_dist["days_after_booking_to_cancel"].to_numpy(),
+             y=cxl_after_booking_dist["count"].to_numpy(),
+             title="Cancellations — Days After Booking", xlabel="Days after booking", ylabel="Count"),
+        dict(kind="line", path=charts_dir / "cxl_days_before_flight.png",
+             x=cxl_before_flight_dist["days_before_flight_to_cancel"].to_numpy(),
+             y=cxl_before_flight_dist["count"].to_numpy(),
+             title="Cancellations — Days Before Flight", xlabel="Days before flight", ylabel="Count"),
+        # 3) LF by DOW and Time of Day
+        dict(kind="bar", path=charts_dir / "lf_by_dow.png",
+             x=lf_by_dow["dow"].astype(str).tolist(), y=lf_by_dow["avg_load_factor"].to_numpy(),
+             title="Average Load Factor by Day of Week", rotation=30),
+        dict(kind="bar", path=charts_dir / "lf_by_time_of_day.png", figsize=(6,4),
+             x=lf_by_tod["timeofday"].astype(str).tolist(), y=lf_by_tod["avg_load_factor"].to_numpy(),
+             title="Average Load Factor by Time of Day"),
+        # Load Factor by Segment and Day of Week (multi-line)
+        dict(kind="lines", path=charts_dir / "lf_by_segment_by_dow.png", figsize=(9,5),
+             x=lf_seg_dow_wide.index.astype(str).tolist(),
+             ys=[lf_seg_dow_wide[c].to_numpy() for c in lf_seg_dow_wide.columns],
+             title="Load Factor by Segment and Day of Week",
+             xlabel="Day of Week", ylabel="Average Load Factor", legend_title="Segment"),
+        # 4) Revenue per pax vs LF (scatter)
+        dict(kind="scatter", path=charts_dir / "rev_per_pax_vs_lf.png", figsize=(6,4),
+             x=leg["load_factor"].to_numpy(), y=leg["rev_per_pax"].to_numpy(),
+             title="Revenue per Passenger vs Load Factor (Leg Level)",
+             xlabel="Load Factor", ylabel="Revenue per Passenger (€)"),
+        # 5) Ancillary share by top segments (barh)
+        dict(kind="barh", path=charts_dir / "anc_share_top_segments.png",
+             x=seg_top["od"].tolist(), y=seg_top["anc_share"].to_numpy(),
+             title="Ancillary Share — Top Segments by Revenue"),
+    ]
+    # charts are independent PNGs; rasterize/compress them across cores
+    with ProcessPoolExecutor(max_workers=min(len(charts), os.cpu_count() or 1)) as ex:
+        list(ex.map(render_chart, charts))
 
     # ------------ Auto-generated insights & recommendations (markdown)
     insights = []
@@ -283,19 +351,21 @@ def run_analysis(xlsx_path: Path, out_dir: Path):
         insights.append(f"- No cancellations recorded on: {', '.join(zero_cancel_days)} → Avoid overbooking on these days; use standard buffers only.")
 
     # B) Highest cancel day & rate
-    cx_max = cxl_rate_by_dow.loc[cxl_rate_by_dow["cancel_rate"].fillna(-1).idxmax()]
-    if pd.notna(cx_max["cancel_rate"]):
+    cx_rates = cxl_rate_by_dow["cancel_rate"].to_numpy(dtype=float)
+    if not np.isnan(cx_rates).all():
+        cx_max = cxl_rate_by_dow.iloc[np.nanargmax(cx_rates)]
         insights.append(f"- Highest cancellation rate: {cx_max['flight_dow']} (rate={cx_max['cancel_rate']:.1%}) → tighten fare fences and increase overbooking buffers on this weekday.")
 
     # C) Days-after-booking median / p90
-    if booking["is_cancelled"].any():
-        med_after = booking.loc[booking["is_cancelled"], "days_after_booking_to_cancel"].median()
-        p90_after = booking.loc[booking["is_cancelled"], "days_after_booking_to_cancel"].quantile(0.90)
+    if not canc.empty:
+        # median + P90 from one np.quantile call (single partial sort per column)
+        after = canc["days_after_booking_to_cancel"].dropna().to_numpy(dtype=float)
+        med_after, p90_after = np.quantile(after, [0.5, 0.9]) if after.size else (np.nan, np.nan)
         insights.append(f"- Median days after booking to cancel ≈ {med_after:.0f}, P90 ≈ {p90_after:.0f} → design refund rules & retention nudges within these windows.")
 
     # D) Days-before-flight median / p90
-        med_before = booking.loc[booking["is_cancelled"], "days_before_flight_to_cancel"].median()
-        p90_before = booking.loc[booking["is_cancelled"], "days_before_flight_to_cancel"].quantile(0.90)
+        before = canc["days_before_flight_to_cancel"].dropna().to_numpy(dtype=float)
+        med_before, p90_before = np.quantile(before, [0.5, 0.9]) if before.size else (np.nan, np.nan)
         insights.append(f"- Median days before flight to cancel ≈ {med_before:.0f}, P90 ≈ {p90_before:.0f} → calibrate overbooking and release of low fares accordingly.")
 
     # E) Channels with highest cancel rate
@@ -305,14 +375,17 @@ def run_analysis(xlsx_path: Path, out_dir: Path):
         insights.append(f"- Channel with highest cancel rate: {chan_sorted.iloc[0]['primary_channel']} (≈ {chan_sorted.iloc[0]['cancel_rate']:.1%}) → steer demand to direct channels or adjust partner SLAs.")
 
     # F) LF by DOW: lowest day
-    lf_low = lf_by_dow.loc[lf_by_dow["avg_load_factor"].idxmin()]
-    lf_high = lf_by_dow.loc[lf_by_dow["avg_load_factor"].idxmax()]
+    # positional nanargmin/nanargmax on the raw arrays (no fillna/idx temporaries)
+    lf_vals = lf_by_dow["avg_load_factor"].to_numpy(dtype=float)
+    lf_low = lf_by_dow.iloc[np.nanargmin(lf_vals)]
+    lf_high = lf_by_dow.iloc[np.nanargmax(lf_vals)]
     insights.append(f"- Lowest average LF: {lf_low['dow']} (≈ {lf_low['avg_load_factor']:.1%}); Highest: {lf_high['dow']} (≈ {lf_high['avg_load_factor']:.1%}) → re-time or stimulate low days; protect yield on high days.")
 
     # G) Time of day
-    if lf_by_tod["avg_load_factor"].notna().any():
-        tod_low = lf_by_tod.loc[lf_by_tod["avg_load_factor"].idxmin()]
-        tod_high = lf_by_tod.loc[lf_by_tod["avg_load_factor"].idxmax()]
+    tod_vals = lf_by_tod["avg_load_factor"].to_numpy(dtype=float)
+    if not np.isnan(tod_vals).all():
+        tod_low = lf_by_tod.iloc[np.nanargmin(tod_vals)]
+        tod_high = lf_by_tod.iloc[np.nanargmax(tod_vals)]
         insights.append(f"- Time-of-day LF: weakest={tod_low['timeofday']} (≈ {tod_low['avg_load_factor']:.1%}), strongest={tod_high['timeofday']} (≈ {tod_high['avg_load_factor']:.1%}) → bank timing & pricing by day-part.")
 
     # H) Rev vs LF correlation
@@ -336,7 +409,6 @@ def run_analysis(xlsx_path: Path, out_dir: Path):
 
     # K) Last-minute cancels (<=1 day)
     last_minute_share = np.nan
-    canc = booking[booking["is_cancelled"]]
     if not canc.empty:
         last_minute_share = (canc["days_before_flight_to_cancel"]<=1).mean()
         insights.append(f"- Last-minute cancellations (≤1 day) ≈ {last_minute_share:.1%} of cancels → raise buffers & pre-emptive reaccommodation in this window.")
@@ -361,8 +433,9 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("excel_path", type=Path, help="Path to the Condor Excel file")
     ap.add_argument("--out", type=Path, default=Path("./reports"), help="Output folder")
+    ap.add_argument("--csv", action="store_true", help="Also write booking_clean/leg_table as CSV")
     args = ap.parse_args()
-    res = run_analysis(args.excel_path, args.out)
+    res = run_analysis(args.excel_path, args.out, csv_dumps=args.csv)
     print("Tables:", res["tables_dir"])
     print("Charts:", res["charts_dir"])
     print("Insights:", res["insights_path"])
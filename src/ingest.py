@@ -1,14 +1,14 @@
-import duckdb, pandas as pd, pathlib as p
+import pandas as pd, pathlib as p
+import pyarrow as pa
+from db import get_conn
+from workbook import EXCEL_ENGINE
 
 ROOT = p.Path(__file__).resolve().parents[1]
-db_path = ROOT / "warehouse" / "condor.duckdb"
-db_path.parent.mkdir(parents=True, exist_ok=True)
-
 xls = ROOT / "data_raw" / "Condor - Analytics Engineer 2025 Business Case DataSet_Final.xlsx"
 
-booking = pd.read_excel(xls, sheet_name="Booking")
-passenger = pd.read_excel(xls, sheet_name="Passenger")
-flight = pd.read_excel(xls, sheet_name="Flight")
+# calamine (Rust) reader when installed; one call parses all three sheets from a single open of the workbook
+sheets = pd.read_excel(xls, sheet_name=["Booking", "Passenger", "Flight"], engine=EXCEL_ENGINE)
+booking, passenger, flight = sheets["Booking"], sheets["Passenger"], sheets["Flight"]
 
 # Normalize columns
 def norm(df):
@@ -21,15 +21,21 @@ def norm(df):
 
 booking, passenger, flight = map(norm, [booking, passenger, flight])
 
-con = duckdb.connect(str(db_path))
+# Hand DuckDB Arrow tables (columnar buffers, no per-column object type sniffing)
+def to_arrow(df):
+    # mixed int/str object columns (passenger bookingid) become VARCHAR, as the pandas bridge did
+    for c in df.columns[df.dtypes == object]:
+        df[c] = df[c].astype("string")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+con = get_conn()
 con.execute("CREATE SCHEMA IF NOT EXISTS raw;")
-con.register("booking_df", booking)
-con.register("passenger_df", passenger)
-con.register("flight_df", flight)
-
-con.execute("CREATE OR REPLACE TABLE raw.booking AS SELECT * FROM booking_df;")
-con.execute("CREATE OR REPLACE TABLE raw.passenger AS SELECT * FROM passenger_df;")
-con.execute("CREATE OR REPLACE TABLE raw.flight AS SELECT * FROM flight_df;")
-con.close()
+con.register("booking_arrow", to_arrow(booking))
+con.register("passenger_arrow", to_arrow(passenger))
+con.register("flight_arrow", to_arrow(flight))
+
+con.execute("CREATE OR REPLACE TABLE raw.booking AS SELECT * FROM booking_arrow;")
+con.execute("CREATE OR REPLACE TABLE raw.passenger AS SELECT * FROM passenger_arrow;")
+con.execute("CREATE OR REPLACE TABLE raw.flight AS SELECT * FROM flight_arrow;")
 
 print("Ingest complete → warehouse/condor.duckdb")
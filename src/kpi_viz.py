@@ -15,17 +15,22 @@ Usage:
   python condor_kpis_viz.py "Condor - Analytics Engineer 2025 Business Case DataSet_Final.xlsx"
 
 Notes:
+- Sheets are cached as Parquet next to the workbook (<xlsx>.parquet/kpi/); pass --force-reload to re-read the Excel.
 - PACS assumptions (easy to tweak in code): 25% connectivity credit, €40 variable cost per seat-leg.
 - The script is resilient to minor column casing/spacing differences.
 """
 
-import sys
-import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import duckdb
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # PNG output only; no GUI backend start-up in main or the render workers
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
+from workbook import EXCEL_ENGINE, cached_frames, fetch_arrow, normalize_booking_ids
 
 # ------------------------- Config / helpers
 PALETTE = {
@@ -36,18 +41,91 @@ PALETTE = {
     "grid": "#e5e7eb",   # light gray
     "axis": "#111827"    # dark gray for lines
 }
+# same map as exploration_insights.CHANNEL_MAP (both normalize the Passenger booking channel)
+CHANNEL_MAP = {
+    "condor app": "condor app",
+    "condor-app": "condor app",
+    "app": "condor app",
+    "website": "website",
+    "web": "website",
+    "call center": "call center",
+    "travel agency": "travel agency",
+    "ota": "ota",
+    "online travel agency": "ota",
+}
 DOW_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DOW_CODES = range(len(DOW_ORDER))  # Series.dt.dayofweek: Monday=0 … Sunday=6
 
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
     out.columns = out.columns.str.strip().str.lower()
     return out
 
-def normalize_booking_id(x):
-    if pd.isna(x): return np.nan
-    s = str(x).strip()
-    s_num = re.sub(r"\D+", "", s)
-    return s_num if s_num else np.nan
+SHEETS = ["Booking", "Passenger", "Flight"]
+
+# dtypes / date parsing pushed into the reader (no to_datetime / to_numeric passes afterwards)
+READ_OPTS = {
+    "Booking": dict(
+        parse_dates=["Reservation Date", "Cancellation Date", "Flight Date"],
+        dtype={
+            "Origin": "category",
+            "Destination": "category",
+            "FlightNumber": "category",
+            "PassengerCount": "Int32",
+            # float32 revenue halves the bytes moved by the booking-level sums/groupbys;
+            # leg measures are widened to float64 before the KPI formulas, so summaries stay float64
+            "Revenue per Booking (Ticket)": "float32",
+            "Revenue per Booking (Ancilliary pre check in)": "float32",
+            "Revenue per Booking (Ancilliary AT check in)": "float32",
+        },
+    ),
+    # ~25 spellings of 5 channels across all rows: categorical so the cleanup runs per category
+    "Passenger": dict(dtype={"Booking Channel": "category"}),
+    "Flight": dict(parse_dates=["FlightDate"]),
+}
+
+def load_sheets(xlsx_path: Path, force_reload: bool = False):
+    """Load the three sheets, via the shared Parquet cache next to the workbook (<xlsx>.parquet/kpi/)."""
+    def read():
+        with pd.ExcelFile(xlsx_path, engine=EXCEL_ENGINE) as xl:
+            return [clean_cols(xl.parse(name, **READ_OPTS[name])) for name in SHEETS]
+    return cached_frames(xlsx_path, "kpi", SHEETS, read, __file__, force_reload=force_reload)
+
+# leg (flight × date × OD) aggregation + capacity join, run by DuckDB over the registered frames
+LEG_SQL = """
+WITH leg AS (
+    SELECT flightnumber, "flight date", origin, destination,
+           COALESCE(SUM(passengercount), 0)::BIGINT AS pax,  -- all-null group → 0, as pandas sum gave
+           SUM(total_revenue)          AS revenue,
+           SUM(is_cancelled::INT)::BIGINT AS cancels
+    FROM booking
+    GROUP BY ALL
+)
+SELECT l.*, f.availablecapacity
+FROM leg l
+-- booking.flightnumber arrives as an ENUM (pandas categorical) and flight.flightnumber as VARCHAR;
+-- DuckDB has no shared dictionary across the two frames (the categorical key of the pandas merge
+-- does not carry over), so both sides are compared as VARCHAR explicitly
+LEFT JOIN flight f
+       ON f.flightnumber::VARCHAR = l.flightnumber::VARCHAR
+      AND f.flightdate = l."flight date"
+ORDER BY l.flightnumber, l."flight date", l.origin, l.destination
+"""
+
+SEG_SQL = """
+SELECT origin, destination,
+       SUM(total_revenue)   AS revenue,
+       SUM(ancillary_total) AS ancillary
+FROM booking
+GROUP BY ALL
+ORDER BY origin, destination
+"""
+
+def with_dow_names(df: pd.DataFrame) -> pd.DataFrame:
+    # int8 weekday code → display name (first column); only for the output tables/charts
+    out = df.drop(columns="dow_code")
+    out.insert(0, "dow", df["dow_code"].map(dict(enumerate(DOW_ORDER))))
+    return out
 
 def ensure_dirs(base: Path):
     (base / "report_imgs").mkdir(parents=True, exist_ok=True)
@@ -83,42 +161,81 @@ def _add_bar_labels(ax, rects, fmt="{:.1%}", offset=0.01, is_currency=False):
             fontsize=9
         )
 
+# ------------------------- Charts (module level so worker processes can pickle them)
+def render_fwlf_calf(merged_fc: pd.DataFrame, path: Path) -> Path:
+    x = np.arange(len(merged_fc["dow"]))
+    bar_w = 0.38
+    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
+    r1 = ax.bar(x - bar_w / 2, merged_fc["fwlf"], width=bar_w, color=PALETTE["fwlf"], label="FWLF (utilization)")
+    r2 = ax.bar(x + bar_w / 2, merged_fc["calf"], width=bar_w, color=PALETTE["calf"], label="CALF (realized)")
+
+    ax.set_title("FWLF vs CALF by Day of Week", fontsize=14, pad=14)
+    ax.set_xticks(x, merged_fc["dow"])
+    _beautify_axes(ax, ylabel="Load Factor", is_ratio=True)
+    ax.legend(frameon=False, loc="upper left")
+    _add_bar_labels(ax, r1, fmt="{:.1%}")
+    _add_bar_labels(ax, r2, fmt="{:.1%}")
+    save_chart(path)
+    return path
+
+def render_pacs(pacs_dow: pd.DataFrame, path: Path) -> Path:
+    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
+    bars = ax.bar(pacs_dow["dow"], pacs_dow["pacs"], color=PALETTE["pacs"], label="PACS (€ per seat-leg)")
+    ax.axhline(0, color=PALETTE["axis"], linewidth=0.8, alpha=0.6)
+    ax.set_title("PACS by Day of Week (€/seat-leg)", fontsize=14, pad=14)
+    _beautify_axes(ax, ylabel="€ per seat-leg", is_ratio=False)
+    ax.legend(frameon=False, loc="upper left")
+    _add_bar_labels(ax, bars, is_currency=True, fmt="{:.1f}")
+    save_chart(path)
+    return path
+
+def render_aras(seg_top_sorted: pd.DataFrame, network_avg_aras: float, path: Path) -> Path:
+    # horizontal, sorted, with network average
+    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
+    bars = ax.barh(seg_top_sorted["od"], seg_top_sorted["aras"], color=PALETTE["aras"], label="Ancillary share")
+    ax.axvline(network_avg_aras, color=PALETTE["axis"], linestyle="--", linewidth=1.0, alpha=0.7,
+               label=f"Network avg ({network_avg_aras:.1%})")
+    ax.set_title("ARAS — Ancillary Revenue Share by Route (Top 10 by Revenue)", fontsize=14, pad=14)
+    _beautify_axes(ax, ylabel=None, is_ratio=False)
+    ax.xaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+    ax.legend(frameon=False, loc="lower right")
+    for r in bars:
+        width = r.get_width()
+        if pd.notna(width):
+            ax.text(width + 0.01, r.get_y() + r.get_height() / 2, f"{width:.1%}", va="center", ha="left", fontsize=9)
+    save_chart(path)
+    return path
+
+def _render_one(task):
+    fn, args = task
+    return fn(*args)
+
 # ------------------------- Core logic
-def main(xlsx_path: Path):
+def main(xlsx_path: Path, force_reload: bool = False):
     out_dir = Path(".")
     ensure_dirs(out_dir)
     img_dir = out_dir / "report_imgs"
     tbl_dir = out_dir / "report_tables"
 
-    # ---- Load sheets
-    xl = pd.ExcelFile(xlsx_path)
-    booking = clean_cols(pd.read_excel(xl, "Booking"))
-    passenger = clean_cols(pd.read_excel(xl, "Passenger"))
-    flight = clean_cols(pd.read_excel(xl, "Flight"))
+    # ---- Load sheets (Parquet cache after the first run)
+    booking, passenger, flight = load_sheets(xlsx_path, force_reload=force_reload)
 
     # ---- Normalize IDs, dates, numerics
     # Booking IDs for join
     if "bookingid (pnr)" in booking.columns:
-        booking["bookingid_norm"] = booking["bookingid (pnr)"].apply(normalize_booking_id)
+        booking["bookingid_norm"] = normalize_booking_ids(booking["bookingid (pnr)"])
     elif "bookingid" in booking.columns:
-        booking["bookingid_norm"] = booking["bookingid"].apply(normalize_booking_id)
+        booking["bookingid_norm"] = normalize_booking_ids(booking["bookingid"])
     else:
         booking["bookingid_norm"] = np.nan
 
     if "bookingid" in passenger.columns:
-        passenger["bookingid_norm"] = passenger["bookingid"].apply(normalize_booking_id)
-
-    # Dates
-    for c in ["reservation date", "cancellation date", "flight date"]:
-        if c in booking.columns:
-            booking[c] = pd.to_datetime(booking[c], errors="coerce")
-    if "flightdate" in flight.columns:
-        flight["flightdate"] = pd.to_datetime(flight["flightdate"], errors="coerce")
+        passenger["bookingid_norm"] = normalize_booking_ids(passenger["bookingid"])
 
-    # OD codes
+    # OD codes (categorical from the reader: clean the few categories, not every row)
     for c in ["origin", "destination"]:
         if c in booking.columns:
-            booking[c] = booking[c].astype(str).str.upper().str.strip()
+            booking[c] = booking[c].map(lambda v: v.strip().upper(), na_action="ignore")
 
     # Revenue fields
     rev_cols = [
@@ -126,79 +243,60 @@ def main(xlsx_path: Path):
         "revenue per booking (ancilliary pre check in)",
         "revenue per booking (ancilliary at check in)"
     ]
-    for c in rev_cols:
-        booking[c] = pd.to_numeric(booking.get(c, 0.0), errors="coerce")
     booking["ancillary_total"] = booking["revenue per booking (ancilliary pre check in)"].fillna(0) + \
                                  booking["revenue per booking (ancilliary at check in)"].fillna(0)
     booking["total_revenue"] = booking[rev_cols].sum(axis=1, skipna=True)
-    booking["passengercount"] = pd.to_numeric(booking.get("passengercount", np.nan), errors="coerce")
     booking["is_cancelled"] = booking.get("cancellation date", pd.NaT).notna()
-    booking["flight_dow"] = booking.get("flight date", pd.NaT).dt.day_name()
 
     # ---- Primary channel per PNR (optional enrichment)
     if "booking channel" in passenger.columns:
+        def norm_channel(v):
+            v = str(v).strip().lower()
+            return CHANNEL_MAP.get(v, v)  # unmapped channels keep their cleaned name
+        # categorical from the reader: clean each distinct spelling once, not every row
         passenger["booking_channel_norm"] = (
-            passenger["booking channel"].astype(str).str.strip().str.lower()
-            .replace({
-                "condor app": "condor app",
-                "condor-app": "condor app",
-                "app": "condor app",
-                "web": "website",
-                "website": "website",
-                "call center": "call center",
-                "travel agency": "travel agency",
-                "ota": "ota",
-                "online travel agency": "ota",
-            })
+            passenger["booking channel"].map(norm_channel, na_action="ignore").astype("category")
         )
+        # first non-null channel per PNR: one dedup pass instead of a per-group lambda
         pnr_channel = (
-            passenger.groupby("bookingid_norm")
-            .agg(primary_channel=("booking_channel_norm", lambda s: next((v for v in s if pd.notna(v)), np.nan)))
-            .reset_index()
+            passenger.dropna(subset=["bookingid_norm", "booking_channel_norm"])
+            .drop_duplicates(subset="bookingid_norm", keep="first")
+            [["bookingid_norm", "booking_channel_norm"]]
+            .rename(columns={"booking_channel_norm": "primary_channel"})
         )
         booking = booking.merge(pnr_channel, on="bookingid_norm", how="left")
 
     # ---- Build leg table (pax/revenue per flight leg) and join capacity
-    leg = (
-        booking.groupby(["flightnumber", "flight date", "origin", "destination"], dropna=False)
-        .agg(
-            pax=("passengercount", "sum"),
-            revenue=("total_revenue", "sum"),
-            cancels=("is_cancelled", "sum"),
-        )
-        .reset_index()
-    )
-    # Merge capacity
-    flight_view = flight[[c for c in ["flightnumber", "flightdate", "availablecapacity", "origin", "destination"] if c in flight.columns]].copy()
-    # prefer join on flightnumber + date
-    leg = leg.merge(
-        flight_view.drop(columns=[c for c in ["origin", "destination"] if c in flight_view.columns]),
-        left_on=["flightnumber", "flight date"],
-        right_on=["flightnumber", "flightdate"],
-        how="left",
-    )
-    if "flightdate" in leg.columns:
-        leg = leg.drop(columns=["flightdate"])
+    # DuckDB scans the frames in place (only the referenced columns) and runs the
+    # groupby + join multithreaded; pandas gets back one row per leg
+    con = duckdb.connect()
+    con.register("booking", booking)
+    con.register("flight", flight)
+    leg = fetch_arrow(con, LEG_SQL).to_pandas()
 
     # Derived
-    leg["dow"] = leg["flight date"].dt.day_name()
+    # dense int8 weekday key for the groupbys; names are attached only for display.
+    # Blank flight dates (see the DQ missing_flight_date check) get -1 and are left out of every DOW metric.
+    leg["dow_code"] = leg["flight date"].dt.dayofweek.fillna(-1).astype("int8")
+    dated = leg["dow_code"].to_numpy() >= 0
     leg["availablecapacity"] = pd.to_numeric(leg["availablecapacity"], errors="coerce")
-    leg["load_factor"] = np.where(leg["availablecapacity"] > 0, leg["pax"] / leg["availablecapacity"], np.nan)
-    leg["rev_per_pax"] = np.where(leg["pax"] > 0, leg["revenue"] / leg["pax"], np.nan)
-
-    # Safe weekday ordering
-    # normalize DOW values to category so sorting is consistent even with missing days
-    for df in [leg, booking]:
-        if "dow" in df.columns:
-            df["dow"] = pd.Categorical(df["dow"], categories=DOW_ORDER, ordered=True)
+    # one C-contiguous float64 row per measure, reused by the LF / CALF / PACS formulas below
+    # (column slices of a freshly aggregated/merged frame can come back strided)
+    pax_a, rev_a, cap_a, cxl_a = np.ascontiguousarray(
+        leg[["pax", "revenue", "availablecapacity", "cancels"]].to_numpy(dtype=np.float64).T
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leg["load_factor"] = np.where(cap_a > 0, pax_a / cap_a, np.nan)
+        leg["rev_per_pax"] = np.where(pax_a > 0, rev_a / pax_a, np.nan)
 
     # =========================
     # Metric 1: FWLF by Day of Week
     # =========================
+    # sum-of-pax / sum-of-seats per DOW from one Cython groupby reduction (no per-group apply)
+    g = leg[dated].groupby("dow_code")[["pax", "availablecapacity"]].sum()
     fwlf_dow = (
-        leg.groupby("dow")
-        .apply(lambda x: (x["pax"].sum() / x["availablecapacity"].sum()) if x["availablecapacity"].sum() > 0 else np.nan)
-        .reindex(DOW_ORDER)
+        (g["pax"] / g["availablecapacity"].where(g["availablecapacity"] > 0))
+        .reindex(DOW_CODES)
         .rename("fwlf")
         .reset_index()
     )
@@ -206,16 +304,10 @@ def main(xlsx_path: Path):
     # =========================
     # Metric 4: CALF by Day of Week (realized LF after cancellations)
     # =========================
-    # realized pax proxy: booked pax - cancellations at booking-grain, summed to leg-grain
-    realized = (
-        booking.assign(realized_pax=lambda d: d["passengercount"].fillna(0) - d["is_cancelled"].astype(int))
-        .groupby(["flightnumber", "flight date"])
-        .agg(realized_pax=("realized_pax", "sum"))
-        .reset_index()
-    )
-    leg2 = leg.merge(realized, on=["flightnumber", "flight date"], how="left")
-    leg2["calf"] = np.where(leg2["availablecapacity"] > 0, leg2["realized_pax"] / leg2["availablecapacity"], np.nan)
-    calf_dow = leg2.groupby("dow")["calf"].mean().reindex(DOW_ORDER).reset_index()
+    # realized pax proxy: booked pax - cancellations, straight from the leg aggregation
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leg["calf"] = np.where(cap_a > 0, (pax_a - cxl_a) / cap_a, np.nan)
+    calf_dow = leg[dated].groupby("dow_code")["calf"].mean().reindex(DOW_CODES).reset_index()
 
     # =========================
     # Metric 2: PACS by Day of Week
@@ -226,121 +318,99 @@ def main(xlsx_path: Path):
 
     fra_fco = leg[(leg["origin"] == "FRA") & (leg["destination"] == "FCO")].copy()
     fco_pmo = leg[(leg["origin"] == "FCO") & (leg["destination"] == "PMO")].copy()
-    onward_rev_map = fco_pmo.groupby("dow")["revenue"].mean().to_dict() if not fco_pmo.empty else {}
-
-    pacs_vals = []
-    for _, r in leg.iterrows():
-        rev = r["revenue"]
-        # credit connection value to FRA->FCO feeder
-        if r["origin"] == "FRA" and r["destination"] == "FCO":
-            rev += connection_value_pct * onward_rev_map.get(r["dow"], 0.0)
-        seats = r["availablecapacity"] if pd.notna(r["availablecapacity"]) else 0
-        pacs = (rev - seats * variable_cost_per_seat_leg) / seats if seats and seats > 0 else np.nan
-        pacs_vals.append({"dow": r["dow"], "pacs": pacs})
-    pacs_dow = pd.DataFrame(pacs_vals).groupby("dow")["pacs"].mean().reindex(DOW_ORDER).reset_index()
+    # mean onward FCO→PMO revenue per weekday as a length-7 table indexed by dow_code (0 where none flew)
+    onward_by_dow = np.zeros(len(DOW_ORDER))
+    g = fco_pmo[fco_pmo["dow_code"] >= 0].groupby("dow_code")["revenue"].mean()
+    onward_by_dow[g.index.to_numpy()] = g.to_numpy()
+
+    # vectorized over all legs: credit connection value to FRA->FCO feeder, then net of seat cost
+    # one gather, no per-leg dict lookups; undated legs (code -1 would wrap to Sunday) get no credit
+    onward_rev = np.where(dated, onward_by_dow[leg["dow_code"].to_numpy()], 0.0)
+    feeder_mask = (leg["origin"].to_numpy() == "FRA") & (leg["destination"].to_numpy() == "FCO")
+    rev = rev_a + np.where(feeder_mask, connection_value_pct * onward_rev, 0.0)
+    seats = np.nan_to_num(cap_a)  # missing capacity → 0 seats → NaN PACS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pacs_arr = np.where(seats > 0, (rev - seats * variable_cost_per_seat_leg) / seats, np.nan)
+    pacs_dow = (
+        pd.DataFrame({"dow_code": leg["dow_code"], "pacs": pacs_arr})[dated]
+        .groupby("dow_code")["pacs"].mean()
+        .reindex(DOW_CODES)
+        .reset_index()
+    )
 
     # =========================
     # Metric 3: ARAS by Route (Top 10 by revenue)
     # ARAS here is ancillary share (ancillary / total revenue) as dataset lacks OD seat capacity.
     # =========================
-    seg = (
-        booking.groupby(["origin", "destination"])
-        .agg(revenue=("total_revenue", "sum"), ancillary=("ancillary_total", "sum"))
-        .reset_index()
-    )
+    seg = fetch_arrow(con, SEG_SQL).to_pandas()
+    con.close()
     seg["aras"] = np.where(seg["revenue"] > 0, seg["ancillary"] / seg["revenue"], np.nan)
-    seg["od"] = seg["origin"] + "→" + seg["destination"]
+    seg["od"] = seg["origin"].astype(str) + "→" + seg["destination"].astype(str)
     seg_top = seg.sort_values("revenue", ascending=False).head(10).copy()
 
     # =========================
     # ---- Charts ----
     # 1) FWLF + CALF grouped by DOW
-    merged_fc = fwlf_dow.merge(calf_dow, on="dow", how="outer")
-    merged_fc["dow"] = pd.Categorical(merged_fc["dow"], categories=DOW_ORDER, ordered=True)
-    merged_fc = merged_fc.sort_values("dow").reset_index(drop=True)
+    merged_fc = with_dow_names(fwlf_dow.merge(calf_dow, on="dow_code", how="outer").sort_values("dow_code"))
+    fwlf_dow, calf_dow, pacs_dow = map(with_dow_names, (fwlf_dow, calf_dow, pacs_dow))
     x = np.arange(len(merged_fc["dow"]))
     bar_w = 0.38
 
-    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
-    r1 = ax.bar(x - bar_w / 2, merged_fc["fwlf"], width=bar_w, color=PALETTE["fwlf"], label="FWLF (utilization)")
-    r2 = ax.bar(x + bar_w / 2, merged_fc["calf"], width=bar_w, color=PALETTE["calf"], label="CALF (realized)")
-
-    ax.set_title("FWLF vs CALF by Day of Week", fontsize=14, pad=14)
-    ax.set_xticks(x, merged_fc["dow"])
-    _beautify_axes(ax, ylabel="Load Factor", is_ratio=True)
-    ax.legend(frameon=False, loc="upper left")
-    _add_bar_labels(ax, r1, fmt="{:.1%}")
-    _add_bar_labels(ax, r2, fmt="{:.1%}")
-    save_chart(img_dir / "fwlf_calf_by_dow.png")
-
-    # 2) PACS by DOW
-    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
-    bars = ax.bar(pacs_dow["dow"], pacs_dow["pacs"], color=PALETTE["pacs"], label="PACS (€ per seat-leg)")
-    ax.axhline(0, color=PALETTE["axis"], linewidth=0.8, alpha=0.6)
-    ax.set_title("PACS by Day of Week (€/seat-leg)", fontsize=14, pad=14)
-    _beautify_axes(ax, ylabel="€ per seat-leg", is_ratio=False)
-    ax.legend(frameon=False, loc="upper left")
-    _add_bar_labels(ax, bars, is_currency=True, fmt="{:.1f}")
-    save_chart(img_dir / "pacs_by_dow.png")
-
-    # 3) ARAS by Route (Top 10) — horizontal, sorted, with network average
     seg_top_sorted = seg_top.sort_values("aras", ascending=True).copy()
     network_avg_aras = seg["aras"].mean(skipna=True)
 
-    fig, ax = plt.subplots(figsize=(10, 6), facecolor="white")
-    bars = ax.barh(seg_top_sorted["od"], seg_top_sorted["aras"], color=PALETTE["aras"], label="Ancillary share")
-    ax.axvline(network_avg_aras, color=PALETTE["axis"], linestyle="--", linewidth=1.0, alpha=0.7,
-               label=f"Network avg ({network_avg_aras:.1%})")
-    ax.set_title("ARAS — Ancillary Revenue Share by Route (Top 10 by Revenue)", fontsize=14, pad=14)
-    _beautify_axes(ax, ylabel=None, is_ratio=False)
-    ax.xaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax.legend(frameon=False, loc="lower right")
-    for r in bars:
-        width = r.get_width()
-        if pd.notna(width):
-            ax.text(width + 0.01, r.get_y() + r.get_height() / 2, f"{width:.1%}", va="center", ha="left", fontsize=9)
-    save_chart(img_dir / "aras_by_route_top10.png")
-
-    # 4) Composite 1-page dashboard (optional)
-    fig = plt.figure(figsize=(14, 10), facecolor="white")
-    gs = fig.add_gridspec(2, 2, wspace=0.25, hspace=0.35)
-
-    # FWLF vs CALF
-    ax1 = fig.add_subplot(gs[0, 0])
-    r1 = ax1.bar(x - bar_w / 2, merged_fc["fwlf"], width=bar_w, color=PALETTE["fwlf"], label="FWLF")
-    r2 = ax1.bar(x + bar_w / 2, merged_fc["calf"], width=bar_w, color=PALETTE["calf"], label="CALF")
-    ax1.set_title("FWLF vs CALF (by DOW)", fontsize=12, pad=10)
-    ax1.set_xticks(x, merged_fc["dow"])
-    _beautify_axes(ax1, ylabel="Load Factor", is_ratio=True)
-    ax1.legend(frameon=False, loc="upper left")
-    _add_bar_labels(ax1, r1, fmt="{:.1%}")
-    _add_bar_labels(ax1, r2, fmt="{:.1%}")
-
-    # PACS
-    ax2 = fig.add_subplot(gs[0, 1])
-    bars2 = ax2.bar(pacs_dow["dow"], pacs_dow["pacs"], color=PALETTE["pacs"], label="PACS (€)")
-    ax2.axhline(0, color=PALETTE["axis"], linewidth=0.8, alpha=0.6)
-    ax2.set_title("PACS (€/seat-leg) by DOW", fontsize=12, pad=10)
-    _beautify_axes(ax2, ylabel="€ per seat-leg", is_ratio=False)
-    ax2.legend(frameon=False, loc="upper left")
-    _add_bar_labels(ax2, bars2, is_currency=True, fmt="{:.1f}")
-
-    # ARAS
-    ax3 = fig.add_subplot(gs[1, :])
-    bars3 = ax3.bar(seg_top_sorted["od"], seg_top_sorted["aras"], color=PALETTE["aras"], label="ARAS share")
-    ax3.axhline(network_avg_aras, color=PALETTE["axis"], linestyle="--", linewidth=1.0, alpha=0.7,
-                label=f"Network avg ({network_avg_aras:.1%})")
-    ax3.set_title("ARAS by Route (Top 10 by Revenue)", fontsize=12, pad=10)
-    _beautify_axes(ax3, ylabel="Ancillary share", is_ratio=False)
-    ax3.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
-    ax3.tick_params(axis="x", labelrotation=30, labelsize=9)
-    for r in bars3:
-        h = r.get_height()
-        if pd.notna(h):
-            ax3.text(r.get_x() + r.get_width() / 2, h + 0.01, f"{h:.1%}", ha="center", va="bottom", fontsize=9)
-    ax3.legend(frameon=False, loc="upper left")
-
-    save_chart(img_dir / "dashboard_composite.png")
+    # charts 1–3 are independent PNGs: render them in worker processes while the
+    # composite (which redraws the same data) is built here in the main process
+    tasks = [
+        (render_fwlf_calf, (merged_fc, img_dir / "fwlf_calf_by_dow.png")),
+        (render_pacs, (pacs_dow, img_dir / "pacs_by_dow.png")),
+        (render_aras, (seg_top_sorted, network_avg_aras, img_dir / "aras_by_route_top10.png")),
+    ]
+    with ProcessPoolExecutor(max_workers=len(tasks)) as ex:
+        pending = [ex.submit(_render_one, t) for t in tasks]
+
+        # 4) Composite 1-page dashboard (optional)
+        fig = plt.figure(figsize=(14, 10), facecolor="white")
+        gs = fig.add_gridspec(2, 2, wspace=0.25, hspace=0.35)
+
+        # FWLF vs CALF
+        ax1 = fig.add_subplot(gs[0, 0])
+        r1 = ax1.bar(x - bar_w / 2, merged_fc["fwlf"], width=bar_w, color=PALETTE["fwlf"], label="FWLF")
+        r2 = ax1.bar(x + bar_w / 2, merged_fc["calf"], width=bar_w, color=PALETTE["calf"], label="CALF")
+        ax1.set_title("FWLF vs CALF (by DOW)", fontsize=12, pad=10)
+        ax1.set_xticks(x, merged_fc["dow"])
+        _beautify_axes(ax1, ylabel="Load Factor", is_ratio=True)
+        ax1.legend(frameon=False, loc="upper left")
+        _add_bar_labels(ax1, r1, fmt="{:.1%}")
+        _add_bar_labels(ax1, r2, fmt="{:.1%}")
+
+        # PACS
+        ax2 = fig.add_subplot(gs[0, 1])
+        bars2 = ax2.bar(pacs_dow["dow"], pacs_dow["pacs"], color=PALETTE["pacs"], label="PACS (€)")
+        ax2.axhline(0, color=PALETTE["axis"], linewidth=0.8, alpha=0.6)
+        ax2.set_title("PACS (€/seat-leg) by DOW", fontsize=12, pad=10)
+        _beautify_axes(ax2, ylabel="€ per seat-leg", is_ratio=False)
+        ax2.legend(frameon=False, loc="upper left")
+        _add_bar_labels(ax2, bars2, is_currency=True, fmt="{:.1f}")
+
+        # ARAS
+        ax3 = fig.add_subplot(gs[1, :])
+        bars3 = ax3.bar(seg_top_sorted["od"], seg_top_sorted["aras"], color=PALETTE["aras"], label="ARAS share")
+        ax3.axhline(network_avg_aras, color=PALETTE["axis"], linestyle="--", linewidth=1.0, alpha=0.7,
+                    label=f"Network avg ({network_avg_aras:.1%})")
+        ax3.set_title("ARAS by Route (Top 10 by Revenue)", fontsize=12, pad=10)
+        _beautify_axes(ax3, ylabel="Ancillary share", is_ratio=False)
+        ax3.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+        ax3.tick_params(axis="x", labelrotation=30, labelsize=9)
+        for r in bars3:
+            h = r.get_height()
+            if pd.notna(h):
+                ax3.text(r.get_x() + r.get_width() / 2, h + 0.01, f"{h:.1%}", ha="center", va="bottom", fontsize=9)
+        ax3.legend(frameon=False, loc="upper left")
+
+        save_chart(img_dir / "dashboard_composite.png")
+        for f in pending:
+            f.result()
 
     # ---- Save executive table
     kpi_tbl = (
@@ -355,7 +425,8 @@ def main(xlsx_path: Path):
 
 # ------------------------- CLI
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print('Usage: python kpi_viz.py "Condor - Analytics Engineer 2025 Business Case DataSet_Final.xlsx"')
-        sys.exit(1)
-    main(Path(sys.argv[1]))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("excel_path", type=Path, help="Path to the Condor Excel file")
+    ap.add_argument("--force-reload", action="store_true", help="Re-read the workbook instead of the Parquet cache")
+    args = ap.parse_args()
+    main(args.excel_path, force_reload=args.force_reload)
@@ -1,7 +1,8 @@
 import duckdb
+from workbook import fetch_arrow
 
-# Connect to the DuckDB database
-conn = duckdb.connect('warehouse/condor.duckdb')
+# Connect to the DuckDB database (read-only: no write lock / WAL setup)
+conn = duckdb.connect('warehouse/condor.duckdb', read_only=True)
 
 # Define your SQL queries
 queries = [
@@ -9,12 +10,11 @@ queries = [
     "SELECT * FROM kpi.pacs_leg ORDER BY pacs_per_seat_leg DESC LIMIT 5;"
 ]
 
-# Execute each query and print the results
+# Execute each query and print the results (one columnar Arrow fetch per query, no per-row tuples)
 for query in queries:
-    result = conn.execute(query).fetchall()
+    tbl = fetch_arrow(conn, query)
     print(f"Results for query: {query}")
-    for row in result:
-        print(row)
+    print(tbl.to_pandas().to_string(index=False))
     print("\n")  # Add a newline for better readability
 
 # Close the connection
@@ -1,4 +1,4 @@
-import pandas as pd, matplotlib.pyplot as plt, pathlib as p
+import numpy as np, pandas as pd, matplotlib.pyplot as plt, pathlib as p
 
 ROOT = p.Path(__file__).resolve().parents[1]
 derived = ROOT / "data_derived"
@@ -9,38 +9,49 @@ fwlf_seg = pd.read_csv(derived / "fwlf_by_segment.csv")
 leg = pd.read_csv(derived / "leg_detail.csv")
 pacs = pd.read_csv(derived / "pacs_leg.csv")
 
+# One figure reused for every chart (cleared between PNGs) instead of a new figure each time
+fig, ax = plt.subplots()
+
+def new_chart():
+    ax.clear()
+    return ax
+
+def save_chart(name):
+    fig.tight_layout()
+    fig.savefig(reports / name)
+
 # 1) FWLF by segment (bar)
-plt.figure()
+new_chart()
 labels = fwlf_seg['origin'] + "→" + fwlf_seg['destination']
 plt.bar(labels, fwlf_seg['fwlf'])
 plt.title("FWLF by Segment")
 plt.ylabel("FWLF")
 plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(reports / "fwlf_by_segment.png")
-plt.close()
+save_chart("fwlf_by_segment.png")
 
 # 2) Revenue per Pax vs Load Factor (scatter)
-leg['rev_per_pax'] = leg['total_revenue'] / leg['pax']
-plt.figure()
-plt.scatter(leg['leg_lf'], leg['rev_per_pax'], alpha=0.6)
+# zero-pax legs → NaN (no inf, no RuntimeWarning), dropped once before plotting
+a = leg['total_revenue'].to_numpy(dtype=np.float64)
+b = leg['pax'].to_numpy(dtype=np.float64)
+rpp = np.divide(a, b, out=np.full_like(a, np.nan), where=b > 0)
+leg['rev_per_pax'] = rpp
+mask = np.isfinite(rpp) & np.isfinite(leg['leg_lf'].to_numpy(dtype=np.float64))
+new_chart()
+plt.scatter(leg['leg_lf'].to_numpy()[mask], rpp[mask], alpha=0.6, rasterized=True)
 plt.title("Revenue per Pax vs Load Factor (Leg)")
 plt.xlabel("Load Factor")
 plt.ylabel("Revenue per Pax (€)")
-plt.tight_layout()
-plt.savefig(reports / "rev_per_pax_vs_lf.png")
-plt.close()
+save_chart("rev_per_pax_vs_lf.png")
 
 # 3) PACS per leg (bar top 20)
 pacs_sorted = pacs.sort_values("pacs_per_seat_leg", ascending=False).head(20)
-plt.figure()
+new_chart()
 labels = pacs_sorted['origin'] + "→" + pacs_sorted['destination'] + " " + pacs_sorted['flight_date'].astype(str)
 plt.bar(labels, pacs_sorted['pacs_per_seat_leg'])
 plt.title("Top 20 PACS per Seat-Leg")
 plt.ylabel("€ per seat-leg")
 plt.xticks(rotation=90)
-plt.tight_layout()
-plt.savefig(reports / "pacs_top20.png")
-plt.close()
+save_chart("pacs_top20.png")
 
+plt.close(fig)
 print("Charts saved to reports/")
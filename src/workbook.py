@@ -0,0 +1,85 @@
+import hashlib, os, re, shutil, pathlib as p
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Helpers shared by the scripts that read the case workbook directly or fetch DuckDB results.
+
+# calamine (Rust) is much faster than openpyxl; fall back if python-calamine isn't installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+_NON_DIGITS = re.compile(r"\D+")
+
+def normalize_booking_ids(s: pd.Series) -> pd.Series:
+    # keep digits only; empty → NA (one vectorized regex pass, no per-row Python)
+    return s.astype("string").str.replace(_NON_DIGITS, "", regex=True).replace({"": pd.NA})
+
+def parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    # mixed int/str object columns (e.g. passenger bookingid) cannot be written to Parquet
+    for c in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[c], skipna=True) != "string":
+            df[c] = df[c].astype("string")
+    return df
+
+def cached_frames(xlsx_path: p.Path, tag: str, names, build, script, force_reload=False):
+    """Frames built from the workbook by build(), cached as <xlsx>.parquet/<tag>/<key>/<name>.parquet.
+
+    The key hashes the workbook's mtime_ns and size plus the mtimes of the calling script and this
+    module, so a replaced workbook (even one with an older mtime) or an edit to the reader options or
+    the normalization gets a new directory; older keys under <tag> are removed on rebuild.
+    """
+    st = xlsx_path.stat()
+    stamp = f"{st.st_mtime_ns}:{st.st_size}:{p.Path(script).stat().st_mtime_ns}:{p.Path(__file__).stat().st_mtime_ns}"
+    key = hashlib.blake2b(stamp.encode(), digest_size=8).hexdigest()
+    tag_dir = xlsx_path.with_name(xlsx_path.name + ".parquet") / tag
+    cache_dir = tag_dir / key
+    cache = {n: cache_dir / f"{n.lower()}.parquet" for n in names}
+    if not force_reload and all(f.exists() for f in cache.values()):
+        return tuple(pd.read_parquet(cache[n]) for n in names)
+
+    frames = tuple(build())
+    if tag_dir.exists():
+        for stale in tag_dir.iterdir():
+            if stale != cache_dir:
+                shutil.rmtree(stale) if stale.is_dir() else stale.unlink()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for n, df in zip(names, frames):
+        # write to a temp name and rename, so an interrupted run never leaves a truncated file in place
+        tmp = cache[n].with_suffix(".parquet.tmp")
+        parquet_safe(df).to_parquet(tmp, engine="pyarrow", compression="zstd")
+        os.replace(tmp, cache[n])
+    return frames
+
+WRITE_BUFFER = 1 << 20  # 1 MiB file buffer instead of io.DEFAULT_BUFFER_SIZE (8 KiB)
+
+def write_csv(df: pd.DataFrame, path):
+    # pyarrow's C++ writer instead of pandas' row-by-row to_csv
+    tbl = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(tbl.schema):
+        if pa.types.is_dictionary(field.type):  # categoricals → plain values
+            tbl = tbl.set_column(i, field.name, tbl.column(i).cast(field.type.value_type))
+        elif pa.types.is_timestamp(field.type):  # date-only timestamps as YYYY-MM-DD, like pandas did
+            try:
+                tbl = tbl.set_column(i, field.name, tbl.column(i).cast(pa.date32()))
+            except pa.ArrowInvalid:
+                pass
+    # unquoted like pandas; Arrow's "needed" style still quotes every string, so it is only the
+    # fallback for a table that has a delimiter/quote/newline inside a value ("none" refuses those)
+    for style in ("none", "needed"):
+        opts = pacsv.WriteOptions(batch_size=65536, quoting_style=style, quoting_header=style)
+        try:
+            with open(path, "wb", buffering=WRITE_BUFFER) as f:
+                pacsv.write_csv(tbl, f, write_options=opts)
+            return
+        except pa.ArrowInvalid:
+            if style == "needed":
+                raise
+
+def fetch_arrow(con, sql: str) -> pa.Table:
+    # .arrow() returns a RecordBatchReader on newer DuckDB, a Table on older releases
+    res = con.execute(sql).arrow()
+    return res.read_all() if isinstance(res, pa.RecordBatchReader) else res